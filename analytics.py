@@ -0,0 +1,162 @@
+"""
+Per-state and per-city price analytics computed in parallel over Observation data
+"""
+# Built-ins
+import concurrent.futures
+import logging
+import math
+import os
+import sqlite3
+import time
+from typing import Optional, Sequence
+# 3rd-party
+import pandas as pd
+# Internal
+import cpi
+from utils import sqlize
+
+logger = logging.getLogger(__name__)
+
+REGION_LEVELS = ('State', 'City')
+DEFAULT_QUANTILES = (0.25, 0.5, 0.75)
+
+
+def _group_columns(by: str) -> list:
+    if by not in REGION_LEVELS:
+        raise ValueError(f'by must be one of {REGION_LEVELS}')
+    return ['Date', 'State', 'Item'] if by == 'State' else ['Date', 'State', 'City', 'Item']
+
+
+def list_partitions(states: Optional[Sequence[str]] = None, items: Optional[Sequence[str]] = None,
+                    db_path: Optional[str] = None) -> list:
+    """
+    Return the (State, Item) pairs present in the database, optionally restricted to the given states/items
+    """
+    conditions = []
+    if states:
+        conditions.append(f"State in ({', '.join(sqlize(s) for s in states)})")
+    if items:
+        conditions.append(f"Item in ({', '.join(sqlize(i) for i in items)})")
+    where_clause = f"where {' and '.join(conditions)}" if conditions else ''
+    sql = f'select distinct State, Item from Observation {where_clause} order by State, Item'
+    with sqlite3.connect(db_path or cpi.db_file) as con:
+        return [tuple(row) for row in con.execute(sql).fetchall()]
+
+
+def _stats_columns(by: str, quantiles: Sequence[float]) -> list:
+    return _group_columns(by) + ['Count', 'Mean', 'Std', 'Min', 'Max'] + [f'P{q * 100:g}' for q in quantiles]
+
+
+def _aggregate(df: pd.DataFrame, group_columns: list, quantiles: Sequence[float]) -> pd.DataFrame:
+    grouped = df.groupby(group_columns)['Price']
+    stats = pd.DataFrame({'Count': grouped.count(), 'Mean': grouped.mean(), 'Std': grouped.std(),
+                          'Min': grouped.min(), 'Max': grouped.max()})
+    for q in quantiles:
+        stats[f'P{q * 100:g}'] = grouped.quantile(q)
+    return stats.reset_index()
+
+
+def aggregate_partition(db_path: str, state: str, item: str, by: str = 'State', chunksize: int = 10000,
+                        quantiles: Sequence[float] = DEFAULT_QUANTILES) -> pd.DataFrame:
+    """
+    Worker function: stream one State/Item partition from SQLite in Date order and return its exact per-group
+    statistics. Each chunk is aggregated once the next one is read, except the rows of its last Date which may
+    continue in the next chunk and are carried over, so no group is split across chunks and memory stays bounded
+    by two chunks plus the rows of a single Date
+    """
+    group_columns = _group_columns(by)
+    sql = (f'select Date, State, City, Item, Price from Observation '
+           f'where State = {sqlize(state)} and Item = {sqlize(item)} order by Date')
+    results = []
+    pending = None
+    # Each worker opens its own connection, sqlite3 connections cannot be shared across processes
+    with sqlite3.connect(db_path) as con:
+        for chunk in pd.read_sql(sql, con, chunksize=chunksize):
+            chunk['Price'] = chunk['Price'].astype(float)
+            if pending is not None:
+                is_last_date = pending['Date'] == pending['Date'].iloc[-1]
+                if not is_last_date.all():
+                    results.append(_aggregate(pending[~is_last_date], group_columns, quantiles))
+                chunk = pd.concat([pending[is_last_date], chunk], ignore_index=True)
+            pending = chunk
+    if pending is not None:
+        results.append(_aggregate(pending, group_columns, quantiles))
+    if not results:
+        return pd.DataFrame(columns=_stats_columns(by, quantiles))
+    return pd.concat(results, ignore_index=True)
+
+
+def price_stats(by: str = 'State', states: Optional[Sequence[str]] = None, items: Optional[Sequence[str]] = None,
+                quantiles: Sequence[float] = DEFAULT_QUANTILES, max_workers: Optional[int] = 1,
+                chunksize: int = 10000) -> pd.DataFrame:
+    """
+    Compute per-date price distribution statistics for each Item, grouped by State or City.
+    Work is split by State/Item partition; max_workers=1 (default) runs in the current process, larger values or
+    None (one worker per core) run the partitions in a process pool.
+    Single-process cost is dominated by pandas overhead of roughly 10ms per partition (~1.9s for 300k rows in 200
+    partitions), against ~20ms to start the pool, so the pool only pays off with many or large partitions and several
+    cores available. On the seeded test data (9 partitions, ~0.07s) the single process is faster. Use benchmark()
+    on the target data to pick a worker count
+    """
+    group_columns = _group_columns(by)  # Validate before spawning any worker
+    db_path = cpi.db_file
+    # Databases created before the index was added to create_table would otherwise be scanned once per partition
+    with sqlite3.connect(db_path) as con:
+        cpi.Observation.create_index(con)
+    partitions = list_partitions(states, items, db_path)
+    if max_workers == 1 or len(partitions) <= 1:
+        results = [aggregate_partition(db_path, state, item, by, chunksize, quantiles)
+                   for state, item in partitions]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(aggregate_partition, db_path, state, item, by, chunksize, quantiles)
+                       for state, item in partitions]
+            results = [f.result() for f in futures]
+    results = [r for r in results if not r.empty]
+    if not results:
+        return pd.DataFrame(columns=_stats_columns(by, quantiles))
+    return pd.concat(results).sort_values(group_columns, ignore_index=True)
+
+
+def price_volatility(stats: pd.DataFrame) -> pd.DataFrame:
+    """
+    Volatility of each Item price over time per region, from the output of price_stats: std of the day-over-day
+    change of the daily mean price. Each series is reindexed to a daily calendar, so changes across a date with no
+    observations are left out rather than spanning several days. Absolute changes rather than returns are used,
+    since zero and negative prices are allowed. Returns one row per (region, Item) with the number of changes used
+    """
+    series_columns = [c for c in ('State', 'City', 'Item') if c in stats.columns]
+    rows = []
+    for key, series in stats.groupby(series_columns, sort=True):
+        daily_mean = series.set_index(pd.to_datetime(series['Date']))['Mean'].sort_index().asfreq('D')
+        changes = daily_mean.diff().dropna()
+        rows.append({**dict(zip(series_columns, key)), 'Changes': len(changes), 'Volatility': changes.std()})
+    return pd.DataFrame(rows, columns=series_columns + ['Changes', 'Volatility'])
+
+
+def benchmark(worker_counts: Optional[Sequence[int]] = None, repeat: int = 3, **kwargs) -> pd.DataFrame:
+    """
+    Time price_stats for each worker count and report speedup and scaling efficiency (speedup / workers)
+    relative to the single-process run
+    """
+    if worker_counts is None:
+        cpu_count = os.cpu_count() or 1
+        worker_counts = sorted({1, *[n for n in (2, 4, 8, 16) if n <= cpu_count], cpu_count})
+    if any(not isinstance(n, int) or n < 1 for n in worker_counts):
+        raise ValueError('worker_counts must be integers greater than 0')
+    timings = {}
+    for n in sorted(set(worker_counts) | {1}):
+        best = math.inf
+        for _ in range(repeat):
+            start = time.perf_counter()
+            price_stats(max_workers=n, **kwargs)
+            best = min(best, time.perf_counter() - start)
+        timings[n] = best
+        logger.info(f'price_stats with {n} worker(s): {best:.3f}s')
+    baseline = timings[1]
+    return pd.DataFrame([{'Workers': n, 'Seconds': t, 'Speedup': baseline / t, 'Efficiency': baseline / t / n}
+                         for n, t in timings.items()])
+
+
+if __name__ == '__main__':
+    print(benchmark().to_string(index=False))
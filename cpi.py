@@ -91,10 +91,18 @@ class Observation:
         with sqlite3.connect(db_file) as con:
             con.execute('drop table if exists Observation')
             con.execute(sql)
+            cls.create_index(con)
             # Load test data
             df = cls.get_test_data()
             df.to_sql('Observation', con=con, if_exists='append', index=False)
 
+    @staticmethod
+    def create_index(con: sqlite3.Connection):
+        """
+        Index used by per-State/Item queries (analytics partitions), avoids a full table scan per partition
+        """
+        con.execute('create index if not exists ix_Observation_State_Item_Date on Observation (State, Item, Date)')
+
     @classmethod
     def get_test_data(cls) -> pd.DataFrame:
         dt_range = pd.date_range(end=datetime.date.today(), periods=10, freq='D', inclusive='both')
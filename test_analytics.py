@@ -0,0 +1,114 @@
+"""
+Tests for analytics.py
+"""
+# Built-ins
+import datetime
+import sqlite3
+import unittest
+# 3rd-party
+# Internal
+import cpi
+from analytics import price_stats, price_volatility, benchmark
+from cpi import Observation
+
+
+class TestPriceStats(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        Observation.create_table()
+        cls.df = Observation.table_df()
+
+    def _assert_matches_pandas(self, stats, group_columns):
+        expected = self.df.groupby(group_columns)['Price'].agg(['count', 'mean', 'std']).reset_index()
+        merged = stats.merge(expected, on=group_columns)
+        self.assertEqual(len(merged.index), len(expected.index))
+        self.assertTrue((merged['Count'] == merged['count']).all())
+        self.assertTrue(((merged['Mean'] - merged['mean']).abs() < 1e-9).all())
+        self.assertTrue(((merged['Std'] - merged['std']).abs() < 1e-9).all())
+        # Quantiles are exact, so they must match pandas' linear interpolation up to float rounding
+        for q in (0.25, 0.5, 0.75):
+            expected_q = self.df.groupby(group_columns)['Price'].quantile(q).rename('expected').reset_index()
+            merged_q = stats.merge(expected_q, on=group_columns)
+            self.assertTrue(((merged_q[f'P{q * 100:g}'] - merged_q['expected']).abs() < 1e-9).all())
+
+    def test_by_state(self):
+        stats = price_stats(by='State', max_workers=1, chunksize=100)
+        self._assert_matches_pandas(stats, ['Date', 'State', 'Item'])
+
+    def test_small_chunks(self):
+        # Groups span several chunks, the carried-over rows must keep the statistics exact
+        stats = price_stats(by='City', max_workers=1, chunksize=7)
+        self._assert_matches_pandas(stats, ['Date', 'State', 'City', 'Item'])
+
+    def test_default_single_process(self):
+        self.assertTrue(price_stats(by='City').equals(price_stats(by='City', max_workers=1)))
+
+    def test_by_city_parallel(self):
+        stats = price_stats(by='City', max_workers=2, chunksize=100)
+        self._assert_matches_pandas(stats, ['Date', 'State', 'City', 'Item'])
+        self.assertTrue(stats.equals(price_stats(by='City', max_workers=1, chunksize=100)))
+
+    def test_filter(self):
+        stats = price_stats(states=['Texas'], items=['Wool Socks (Pair)'], max_workers=1)
+        self.assertEqual(set(stats['State']), {'Texas'})
+        self.assertEqual(set(stats['Item']), {'Wool Socks (Pair)'})
+
+    def test_invalid_level(self):
+        with self.assertRaises(ValueError):
+            price_stats(by='Country')
+
+    def test_benchmark(self):
+        result = benchmark(worker_counts=[2], repeat=1)
+        self.assertEqual(list(result.columns), ['Workers', 'Seconds', 'Speedup', 'Efficiency'])
+        self.assertEqual(list(result['Workers']), [1, 2])
+        two = result.iloc[1]
+        self.assertAlmostEqual(two['Speedup'], result['Seconds'].iloc[0] / two['Seconds'])
+        self.assertAlmostEqual(two['Efficiency'], two['Speedup'] / 2)
+
+    def test_benchmark_invalid_workers(self):
+        for worker_counts in ([0], [-1]):
+            with self.assertRaises(ValueError):
+                benchmark(worker_counts=worker_counts, repeat=1)
+
+
+class TestPriceVolatility(unittest.TestCase):
+
+    def setUp(self):
+        Observation.create_table()
+
+    @staticmethod
+    def _expected_volatility(df, city, item):
+        # Daily mean from the raw rows, then std of the changes between consecutive calendar days only
+        rows = df[(df['City'] == city) & (df['Item'] == item)]
+        daily_mean = rows.groupby('Date')['Price'].mean()
+        dates = [datetime.date.fromisoformat(d) for d in daily_mean.index]
+        changes = [b - a for d1, d2, a, b in zip(dates, dates[1:], daily_mean, daily_mean.iloc[1:])
+                   if (d2 - d1).days == 1]
+        mean = sum(changes) / len(changes)
+        return len(changes), (sum((c - mean) ** 2 for c in changes) / (len(changes) - 1)) ** 0.5
+
+    def _assert_volatility(self, city, item):
+        expected_changes, expected = self._expected_volatility(Observation.table_df(), city, item)
+        volatility = price_volatility(price_stats(by='City'))
+        row = volatility[(volatility['City'] == city) & (volatility['Item'] == item)].iloc[0]
+        self.assertEqual(row['Changes'], expected_changes)
+        self.assertAlmostEqual(row['Volatility'], expected)
+        return row
+
+    def test_volatility(self):
+        row = self._assert_volatility('Dallas', 'Wool Socks (Pair)')
+        self.assertEqual(row['Changes'], 9)  # 10 consecutive days of test data
+        self.assertEqual(len(price_volatility(price_stats(by='State')).index), 9)
+
+    def test_volatility_missing_date(self):
+        gap = (datetime.date.today() - datetime.timedelta(days=4)).isoformat()
+        with sqlite3.connect(cpi.db_file) as con:
+            con.execute(f"delete from Observation where City = 'Dallas' and Item = 'Wool Socks (Pair)' "
+                        f"and Date = '{gap}'")
+        row = self._assert_volatility('Dallas', 'Wool Socks (Pair)')
+        self.assertEqual(row['Changes'], 7)  # The two changes touching the missing date are left out
+
+
+if __name__ == '__main__':
+    unittest.main()